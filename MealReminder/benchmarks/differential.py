@@ -0,0 +1,83 @@
+"""
+Checks that every matcher resolves noisy sheet cells to the same members, with the
+same scores and strategies, as the reference: the linear matcher on the original DP
+edit distance. Also compares their top matches, and records how much faster each
+matcher is. Matchers in APPROXIMATE_MATCHERS are only reported, never failed.
+Exits with status 1 on any mismatch.
+
+Usage (from the MealReminder directory):
+    python -m benchmarks.differential [--sizes 100 1000] [--queries 300]
+                                      [--seeds 0 1 2] [--output differential.json]
+"""
+import sys
+import json
+import time
+import argparse
+from includes.functions import cleanName, setEditBackend
+from includes.indexes import MATCHERS, APPROXIMATE_MATCHERS
+from includes.objects import Student, Group
+from benchmarks.synthetic import rosterRows, noisyCells
+
+# number of top matches compared for each cell
+TOP_K = 3
+
+def outcome(group, cell):
+  '''
+  Returns what has to agree between matchers for cell: the resolved member, score
+  and strategy, and the names, scores and strategies of the top matches.
+  '''
+  match = group.resolve(cell)
+  top = [(m.name, m.score, m.strategy) for m in group.topMatches(cell, TOP_K)]
+  return(tuple(match[:1] + match[2:]) if match is not None else None, top)
+
+def run(matcher, rows, cells, backend):
+  '''
+  Returns the outcomes of every cell under matcher and backend, and the seconds it
+  took to build the group and resolve them.
+  '''
+  setEditBackend(backend)
+  try:
+    start = time.perf_counter()
+    group = Group(matcher=matcher, cacheSize=0)
+    group.addMembers([Student(name, email) for (name, email) in rows])
+    outcomes = [outcome(group, cell) for cell in cells]
+    return(outcomes, time.perf_counter() - start)
+  finally:
+    setEditBackend("myers")
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description="Differential check of the name matchers")
+  parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000])
+  parser.add_argument("--queries", type=int, default=300)
+  parser.add_argument("--seeds", type=int, nargs="+", default=[0, 1, 2])
+  parser.add_argument("--output", default="differential.json")
+  args = parser.parse_args(argv)
+
+  results = []
+  failed = False
+  for size in args.sizes:
+    for seed in args.seeds:
+      rows = rosterRows(size, seed=seed)
+      cells = noisyCells([cleanName(name, upper=False) for (name, email) in rows],
+                         args.queries, seed=seed)
+      reference, referenceTime = run("linear", rows, cells, "dp")
+
+      for matcher in sorted(MATCHERS):
+        outcomes, seconds = run(matcher, rows, cells, "myers")
+        mismatches = [cell for (cell, a, b) in zip(cells, reference, outcomes) if a != b]
+        exact = matcher not in APPROXIMATE_MATCHERS
+        failed = failed or (exact and len(mismatches) > 0)
+        results.append({"matcher": matcher, "size": size, "seed": seed, "exact": exact,
+                        "mismatches": len(mismatches), "examples": mismatches[:5],
+                        "seconds": seconds, "speedup": referenceTime/seconds})
+        print("{:>8} {:>6} seed {}: {:4} mismatches{} {:7.1f}x".format(
+              matcher, size, seed, len(mismatches), "" if exact else " (approximate)",
+              referenceTime/seconds))
+
+  with open(args.output, 'w') as output:
+    json.dump({"passed": not failed, "results": results}, output, indent=2)
+  print("{}. Results written to {}".format("FAILED" if failed else "Passed", args.output))
+  return(1 if failed else 0)
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -0,0 +1,61 @@
+"""
+Measures the memory held per student and per group member. The cleanName cache is
+emptied before each measurement, so that the order they run in does not matter;
+students are measured with their cleaned names already built, leaving only the
+cost of the instances.
+
+Usage (from the MealReminder directory):
+    python -m benchmarks.memory [members]
+"""
+import sys
+import tracemalloc
+from includes.objects import Student, Group, EMAIL_REGEX
+from includes.functions import cleanName, cleanNameCached
+from benchmarks.synthetic import rosterRows
+
+class PlainStudent(object):
+  '''
+  Student with a per instance dictionary, as students were before they had slots.
+  '''
+  def __init__(self,name,email):
+    self.name = cleanName(name)
+    self.email = email if EMAIL_REGEX.match(email) else None
+
+def allocated(build):
+  '''
+  Returns the number of bytes still allocated once build() returns, and its result.
+  '''
+  tracemalloc.start()
+  result = build()
+  size = tracemalloc.get_traced_memory()[0]
+  tracemalloc.stop()
+  return(size, result)
+
+def buildGroup(rows, matcher):
+  '''
+  Returns a group with a student per (name, email) row, matched with matcher.
+  '''
+  group = Group(matcher=matcher)
+  group.addMembers([Student(name, email) for (name, email) in rows])
+  return group
+
+def main():
+  n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+  rows = rosterRows(n)
+
+  print("{} members".format(n))
+  for cls in (PlainStudent, Student):
+    cleanNameCached.cache_clear()
+    names = [cleanName(name) for (name, email) in rows]
+    size, students = allocated(lambda: [cls(name, email) for (name, email) in rows])
+    print("{:>14}: {:8.1f} bytes per student".format(cls.__name__, size/n))
+    del students, names
+
+  for matcher in ("linear", "ngram"):
+    cleanNameCached.cache_clear()
+    size, group = allocated(lambda: buildGroup(rows, matcher))
+    print("{:>14}: {:8.1f} bytes per member".format("group " + matcher, size/n))
+    del group
+
+if __name__ == '__main__':
+  main()
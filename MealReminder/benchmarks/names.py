@@ -0,0 +1,119 @@
+"""
+Benchmarks name resolution (Group.resolve under every matcher), editDistance
+(under every edit backend) and cleanName on synthetic rosters and noisy sheet
+cells, and writes the results as JSON.
+
+Usage (from the MealReminder directory):
+    python -m benchmarks.names [--sizes 100 1000 10000] [--queries 200]
+                               [--matchers ngram bktree ...] [--output names.json]
+"""
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+from includes import functions
+from includes.functions import cleanName, editDistance, setEditBackend, EDIT_BACKENDS
+from includes.indexes import MATCHERS
+from includes.objects import Student, Group
+from benchmarks.synthetic import rosterRows, noisyCells
+
+# matchers comparing against every member are skipped on rosters larger than this,
+# unless asked for explicitly
+SCAN_MATCHERS = ("linear", "bounded")
+MAX_SCAN_SIZE = 10000
+
+def percentile(sortedValues, p):
+  '''
+  Returns the p-th percentile of a sorted, non-empty list (nearest rank).
+  '''
+  return sortedValues[min(len(sortedValues) - 1, int(p/100*len(sortedValues)))]
+
+def latencies(call, inputs):
+  '''
+  Calls call on each input, and returns the sorted list of seconds each call took.
+  '''
+  times = []
+  for x in inputs:
+    start = time.perf_counter()
+    call(x)
+    times.append(time.perf_counter() - start)
+  return sorted(times)
+
+def summary(times, **fields):
+  '''
+  Returns fields along with the throughput and p50/p99 latencies of times.
+  '''
+  fields.update({"calls": len(times),
+                 "per_second": len(times)/sum(times) if sum(times) > 0 else None,
+                 "p50_ms": 1000*percentile(times, 50),
+                 "p99_ms": 1000*percentile(times, 99)})
+  return fields
+
+def benchResolve(size, matcher, cells):
+  '''
+  Builds a group of size synthetic members with matcher while tracing its memory,
+  then times resolving each of cells without the cache.
+  '''
+  rows = rosterRows(size, seed=size)
+  tracemalloc.start()
+  start = time.perf_counter()
+  group = Group(matcher=matcher, cacheSize=0)
+  group.addMembers([Student(name, email) for (name, email) in rows])
+  build = time.perf_counter() - start
+  peak = tracemalloc.get_traced_memory()[1]
+  tracemalloc.stop()
+
+  return summary(latencies(group.resolve, cells), kind="resolve", matcher=matcher,
+                 size=size, build_s=build, peak_mb=peak/2**20)
+
+def benchEditDistance(backend, pairs):
+  '''
+  Times editDistance on each (s, t) of pairs with backend.
+  '''
+  setEditBackend(backend)
+  try:
+    return summary(latencies(lambda pair: editDistance(*pair), pairs),
+                   kind="editDistance", backend=backend)
+  finally:
+    setEditBackend("myers")
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description="Name matching benchmarks")
+  parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+  parser.add_argument("--queries", type=int, default=200)
+  parser.add_argument("--matchers", nargs="+", default=None, choices=sorted(MATCHERS))
+  parser.add_argument("--output", default="names.json")
+  args = parser.parse_args(argv)
+
+  results = []
+  for size in args.sizes:
+    names = [cleanName(name, upper=False) for (name, email) in rosterRows(size, seed=size)]
+    cells = noisyCells(names, args.queries, seed=size)
+    for matcher in (args.matchers or sorted(MATCHERS)):
+      if args.matchers is None and matcher in SCAN_MATCHERS and size > MAX_SCAN_SIZE:
+        continue
+      results.append(benchResolve(size, matcher, cells))
+      print("resolve {matcher:>8} {size:>7}: {per_second:9.1f}/s p50 {p50_ms:8.3f}ms "
+            "p99 {p99_ms:8.3f}ms peak {peak_mb:7.1f}MB".format(**results[-1]))
+
+  names = [cleanName(name) for (name, email) in rosterRows(1000)]
+  cells = [cleanName(cell) for cell in noisyCells(names, 2000)]
+  pairs = list(zip(cells, names*2))
+  for backend in sorted(EDIT_BACKENDS):
+    results.append(benchEditDistance(backend, pairs))
+    print("editDistance {backend:>8}: {per_second:9.1f}/s p50 {p50_ms:8.4f}ms "
+          "p99 {p99_ms:8.4f}ms".format(**results[-1]))
+
+  # cleanName is cached, so time the uncached pipeline
+  uncached = functions.cleanNameCached.__wrapped__
+  results.append(summary(latencies(lambda cell: uncached(cell, True, True), cells),
+                         kind="cleanName"))
+  print("cleanName: {per_second:9.1f}/s p50 {p50_ms:8.4f}ms p99 {p99_ms:8.4f}ms".format(**results[-1]))
+
+  with open(args.output, 'w') as output:
+    json.dump({"python": sys.version, "results": results}, output, indent=2)
+  print("Results written to {}".format(args.output))
+
+if __name__ == '__main__':
+  main()
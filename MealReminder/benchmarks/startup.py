@@ -0,0 +1,40 @@
+"""
+Times loading a synthetic student file without a snapshot, with a cold snapshot
+(first run, which also writes it) and with a warm one.
+
+Usage (from the MealReminder directory):
+    python -m benchmarks.startup [members]
+"""
+import sys
+import csv
+import time
+import tempfile
+from os import path
+from includes.objects import Group
+from mealmails import loadStudentInfo, loadStudentSnapshot
+from benchmarks.synthetic import rosterRows
+
+def timed(load, filePath):
+  '''
+  Returns the seconds load takes to fill a new group from filePath.
+  '''
+  start = time.perf_counter()
+  load(filePath, Group())
+  return time.perf_counter() - start
+
+def main():
+  n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+  with tempfile.TemporaryDirectory() as tmp:
+    filePath = path.join(tmp, "students.csv")
+    with open(filePath, 'w', newline='') as studentFile:
+      writer = csv.writer(studentFile)
+      writer.writerow(["Name", "Email"])
+      writer.writerows(rosterRows(n))
+
+    print("{} members".format(n))
+    print("{:>10}: {:7.3f}s".format("csv", timed(loadStudentInfo, filePath)))
+    print("{:>10}: {:7.3f}s".format("cold", timed(loadStudentSnapshot, filePath)))
+    print("{:>10}: {:7.3f}s".format("warm", timed(loadStudentSnapshot, filePath)))
+
+if __name__ == '__main__':
+  main()
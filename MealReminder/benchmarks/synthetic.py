@@ -0,0 +1,81 @@
+import random
+
+'''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''
+Synthetic Data Used by the Benchmarks
+'''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''
+SYLLABLES = ["al", "an", "ar", "be", "ca", "da", "el", "en", "er", "ga", "ha", "is",
+             "ja", "ka", "la", "li", "ma", "mi", "na", "ne", "o", "pa", "ra", "ri",
+             "sa", "son", "ta", "th", "va", "wa", "yo", "za"]
+
+def syntheticWord(rnd):
+  '''
+  Returns a capitalized, name like word of two to four syllables.
+  '''
+  return("".join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 4))).capitalize())
+
+def rosterNames(n, seed=0):
+  '''
+  Returns n distinct "First Last" names, with first names drawn from a much smaller
+  pool than last names (as on real rosters).
+  '''
+  rnd = random.Random(seed)
+  firsts = [syntheticWord(rnd) for _ in range(max(10, n//20))]
+  names = {}
+  while len(names) < n:
+    name = rnd.choice(firsts) + " " + syntheticWord(rnd)
+    names[name] = True
+  return list(names)
+
+def rosterRows(n, seed=0):
+  '''
+  Returns n (name, email) rows like the ones of the student file.
+  '''
+  return([(name, name.lower().replace(" ", ".") + "@college.harvard.edu")
+          for name in rosterNames(n, seed)])
+
+def typo(word, rnd):
+  '''
+  Returns word with one random letter substituted, dropped, added or swapped with
+  the next one.
+  '''
+  if len(word) < 2:
+    return word + rnd.choice("aeiou")
+
+  i = rnd.randrange(len(word) - 1)
+  kind = rnd.randrange(4)
+  if kind == 0:
+    return word[:i] + rnd.choice("aeiourstln") + word[i + 1:]
+  elif kind == 1:
+    return word[:i] + word[i + 1:]
+  elif kind == 2:
+    return word[:i] + rnd.choice("aeiourstln") + word[i:]
+  else:
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+def noisyCells(names, n, seed=0):
+  '''
+  Returns n sheet cells referring to names the way people type them: with typos,
+  nicknames (a shortened first name), a single word of the name, in swapped order,
+  with stray spaces and symbols, or for someone not on the roster at all.
+  '''
+  rnd = random.Random(seed)
+  cells = []
+  for _ in range(n):
+    first, last = rnd.choice(names).split(" ", 1)
+    kind = rnd.randrange(7)
+    if kind == 0:
+      cell = first + " " + last
+    elif kind == 1:
+      cell = typo(first, rnd) + " " + typo(last, rnd)
+    elif kind == 2:
+      cell = first[:max(3, len(first)//2)]
+    elif kind == 3:
+      cell = rnd.choice([first, typo(first, rnd)])
+    elif kind == 4:
+      cell = rnd.choice([last, typo(last, rnd)])
+    elif kind == 5:
+      cell = last + " " + first
+    else:
+      cell = syntheticWord(rnd) + " " + syntheticWord(rnd)
+    cells.append(rnd.choice(["", " "]) + cell.lower() + rnd.choice(["", "  ", ".", "*"]))
+  return cells
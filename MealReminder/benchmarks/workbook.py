@@ -0,0 +1,188 @@
+"""
+Times reading the rows of one sheet out of a many-sheet schedule workbook, parsing
+the whole workbook as before and on demand as Group.upcomingMembersDuties does now,
+along with the peak memory traced while doing so. Writing the .xls fixture needs
+xlwt. The same schedule saved as .xlsx is then read for the rows of a single day
+through each engine of includes.sheets. Last, upcomingMembersDuties is timed from a
+fresh Group, as each mealmails run does, on both files.
+
+Usage (from the MealReminder directory):
+    python -m benchmarks.workbook [sheets] [rows]
+"""
+import sys
+import time
+import datetime
+import tempfile
+import tracemalloc
+import zipfile
+import xlrd
+from os import path
+from xml.sax.saxutils import escape
+from includes.sheets import SHEET_ENGINES, XlrdSheet, openSheet
+from includes.objects import Group, rowDate
+
+# name of the sheet read, as in mealmails
+SHEET = "Signs"
+
+# number of students taking turns on the shifts
+STUDENTS = 120
+
+# day of the first row of the fixtures, which then follow each other a day per row
+FIRST_DAY = datetime.date(2015, 1, 1)
+
+def dayLabel(row):
+  '''
+  Returns the first cell of row in the fixtures, such as "Thu 1/1": the dates of a
+  year in order, starting over every year.
+  '''
+  day = FIRST_DAY + datetime.timedelta(days=row % 365)
+  return "{} {}/{}".format(day.strftime("%a"), day.month, day.day)
+
+def studentName(row, col):
+  '''
+  Returns the name of the student on duty in cell (row, col) of the fixtures.
+  '''
+  return "Student {}".format((8*row + col) % STUDENTS)
+
+def writeFixture(filePath, sheets, rows):
+  '''
+  Writes an .xls workbook with sheets sheets of rows dated rows each, SHEET last.
+  '''
+  import xlwt
+  workbook = xlwt.Workbook()
+  for s in range(sheets):
+    sheet = workbook.add_sheet(SHEET if s == sheets - 1 else "Week {}".format(s))
+    for r in range(rows):
+      sheet.write(r, 0, dayLabel(r))
+      for c in range(1, 9):
+        sheet.write(r, c, studentName(r, c))
+  workbook.save(filePath)
+
+def xlsxPart(root, body):
+  '''
+  Returns the XML of an .xlsx part with the given root element and body.
+  '''
+  return('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+         '<{0} xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+         'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+         '{1}</{0}>'.format(root, body))
+
+def writeXlsxFixture(filePath, sheets, rows):
+  '''
+  Writes the workbook of writeFixture as .xlsx, with its text in shared strings.
+  '''
+  strings = {}
+  def shared(text):
+    return strings.setdefault(text, len(strings))
+
+  with zipfile.ZipFile(filePath, "w", zipfile.ZIP_DEFLATED) as archive:
+    names = []
+    for s in range(sheets):
+      names.append(SHEET if s == sheets - 1 else "Week {}".format(s))
+      rowsXml = []
+      for r in range(rows):
+        texts = [dayLabel(r)]
+        texts += [studentName(r, c) for c in range(1, 9)]
+        cells = "".join('<c r="{}{}" t="s"><v>{}</v></c>'.format(chr(ord('A') + c), r + 1, shared(t))
+                        for (c, t) in enumerate(texts))
+        rowsXml.append('<row r="{}">{}</row>'.format(r + 1, cells))
+      archive.writestr("xl/worksheets/sheet{}.xml".format(s + 1),
+                       xlsxPart("worksheet", '<dimension ref="A1:I{}"/><sheetData>{}</sheetData>'
+                                .format(rows, "".join(rowsXml))))
+
+    archive.writestr("xl/sharedStrings.xml", xlsxPart("sst", "".join(
+      "<si><t>{}</t></si>".format(escape(t)) for t in strings)))
+    archive.writestr("xl/workbook.xml", xlsxPart("workbook", "<sheets>{}</sheets>".format("".join(
+      '<sheet name="{}" sheetId="{}" r:id="rId{}"/>'.format(n, s + 1, s + 1) for (s, n) in enumerate(names)))))
+    archive.writestr("xl/_rels/workbook.xml.rels",
+      '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">{}'
+      '<Relationship Id="rIdS" Target="sharedStrings.xml" Type="http://schemas.openxmlformats.org/'
+      'officeDocument/2006/relationships/sharedStrings"/></Relationships>'.format("".join(
+        '<Relationship Id="rId{0}" Target="worksheets/sheet{0}.xml" Type="http://schemas.openxmlformats.org/'
+        'officeDocument/2006/relationships/worksheet"/>'.format(s + 1) for s in range(sheets))))
+    archive.writestr("_rels/.rels",
+      '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+      '<Relationship Id="rId1" Target="xl/workbook.xml" Type="http://schemas.openxmlformats.org/'
+      'officeDocument/2006/relationships/officeDocument"/></Relationships>')
+    archive.writestr("[Content_Types].xml",
+      '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+      '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+      '<Default Extension="xml" ContentType="application/xml"/>'
+      '<Override PartName="/xl/workbook.xml" ContentType="application/'
+      'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>{}'
+      '<Override PartName="/xl/sharedStrings.xml" ContentType="application/'
+      'vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/></Types>'.format("".join(
+        '<Override PartName="/xl/worksheets/sheet{}.xml" ContentType="application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'.format(s + 1)
+        for s in range(sheets))))
+
+def readWhole(filePath):
+  '''
+  Reads SHEET as before: parsing every sheet of the workbook.
+  '''
+  signs = xlrd.open_workbook(filePath).sheet_by_name(SHEET)
+  return [signs.row_values(i) for i in range(signs.nrows)]
+
+def readOnDemand(filePath):
+  '''
+  Reads SHEET as now, through the reader upcomingMembersDuties uses for .xls: only
+  parsing it, and releasing it afterwards.
+  '''
+  return [row for (val, row) in XlrdSheet(filePath, SHEET).rows(lambda i, val: True)]
+
+def readDay(engine):
+  '''
+  Returns a reader of the rows of a single day of SHEET through engine.
+  '''
+  def read(filePath):
+    return list(openSheet(filePath, SHEET, engine).rows(lambda i, val: rowDate(val) == "1/1"))
+  read.__name__ = engine
+  return read
+
+def upcoming(filePath, engine=None):
+  '''
+  Returns the seconds taken by a fresh Group to read the duties of the 12 hours
+  from 9:00AM on the first day of the fixture, and the number of names on duty.
+  '''
+  start = time.perf_counter()
+  group = Group(eFile=filePath, eSheet=SHEET, sheetEngine=engine)
+  duties = group.upcomingMembersDuties(datetime.datetime.combine(FIRST_DAY, datetime.time(9, 0)),
+                                       datetime.timedelta(hours=12))
+  return(time.perf_counter() - start, len(duties))
+
+def measure(read, filePath):
+  '''
+  Returns the seconds and the peak traced megabytes of read(filePath).
+  '''
+  tracemalloc.start()
+  start = time.perf_counter()
+  read(filePath)
+  seconds = time.perf_counter() - start
+  peak = tracemalloc.get_traced_memory()[1]
+  tracemalloc.stop()
+  return(seconds, peak/2**20)
+
+def main():
+  sheets = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+  rows = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+  with tempfile.TemporaryDirectory() as tmp:
+    filePath = path.join(tmp, "shifts.xls")
+    writeFixture(filePath, sheets, rows)
+    print("{} sheets of {} rows".format(sheets, rows))
+    for read in (readWhole, readOnDemand):
+      print("{:>13}: {:7.3f}s, peak {:7.1f}MB".format(read.__name__, *measure(read, filePath)))
+
+    filePath = path.join(tmp, "shifts.xlsx")
+    writeXlsxFixture(filePath, sheets, rows)
+    print("as .xlsx, rows of one day")
+    for engine in sorted(SHEET_ENGINES):
+      read = readDay(engine)
+      print("{:>13}: {:7.3f}s, peak {:7.1f}MB".format(read.__name__, *measure(read, filePath)))
+
+    print("upcomingMembersDuties from a fresh Group")
+    for (name, engine) in (("shifts.xls", "xlrd"), ("shifts.xlsx", "xlrd"), ("shifts.xlsx", "stream")):
+      print("{:>13}: {:7.3f}s, {} names on duty".format(
+            path.splitext(name)[1] + " " + engine, *upcoming(path.join(tmp, name), engine)))
+
+if __name__ == '__main__':
+  main()
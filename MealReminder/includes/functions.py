@@ -1,10 +1,15 @@
 import re
+import sys
 import datetime
+import unicodedata
+from functools import lru_cache
 
 class Duty(object):
   '''
   Contains information on a single type of Meal Duty
   '''
+  __slots__ = ("rows", "meal", "type", "time")
+
   def __init__(self,rows,meal,mtype, timeString):
     self.rows = rows
     self.meal = meal
@@ -29,31 +34,22 @@ TIMECOLS = {  "7:00AM"  : Duty([1], "Breakfast", "Prep.", "7:00 AM"),
 '''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''
 Helper Functions Used in MealReminder Program
 '''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''
-def checkTime(limBelow, limAbove):
+def minuteOfDay(t):
   '''
-  Returns the list of (index, duty) of the columns whose time is limBelow <= time <= limAbove
-  @limAbove and limBelow are both (hh, mm) tuple.
+  Returns the minutes past midnight of the time t (which is a string in format
+  HH:MM{PM/AM})
   '''
-  def underLim(t):
-    '''
-    etunrs true if the time t (which is a string in format HH:MM{PM/AM}) occurs
-    before lim.
-    '''
-    hhA, mmA = limAbove
-    hhB, mmB = limBelow
-    # get time for t and for lim
-    tDate = datetime.datetime.strptime(t, "%I:%M%p")
-    limAboveDate = datetime.datetime(year=tDate.year, month=tDate.month, day=tDate.day,
-                                hour=hhA, minute=mmA)
-    limBelowDate = datetime.datetime(year=tDate.year, month=tDate.month, day=tDate.day,
-                                hour=hhB, minute=mmB)
-    return(limBelowDate <= tDate <= limAboveDate)
-
-  # list of duties
-  lDuties = [duty for (time, duty) in TIMECOLS.items() if underLim(time)]
-  return([(index, duty) for duty in lDuties for index in duty.rows])
+  tDate = datetime.datetime.strptime(t, "%I:%M%p")
+  return(60*tDate.hour + tDate.minute)
 
-def editDistance(s,t):
+# (index, duty) of every column of TIMECOLS sorted by time, along with the minute of day
+# of each, which the duties read from the sheet are sorted by
+DUTY_COLUMNS = sorted(((minuteOfDay(time), index, duty) for (time, duty) in TIMECOLS.items()
+                       for index in duty.rows), key=lambda col: col[:2])
+DUTY_MINUTES = [minute for (minute, index, duty) in DUTY_COLUMNS]
+DUTY_COLUMNS = [(index, duty) for (minute, index, duty) in DUTY_COLUMNS]
+
+def dpEditDistance(s,t):
   '''
   Calculates the smallest number of deletions, insertions, or letter changes 
   required to convert the string s into the string t
@@ -70,6 +66,138 @@ def editDistance(s,t):
 
   return results[len(s)][len(t)]
 
+def myersEditDistance(s,t):
+  '''
+  Same distance as dpEditDistance, computed with Myers' bit-parallel algorithm
+  (in Hyyro's formulation). Each column of the DP matrix is kept as two bit vectors
+  of vertical +1/-1 deltas, so a character of t costs a handful of integer
+  operations instead of len(s) cell updates. Python integers are unbounded, so
+  names longer than a machine word simply use wider vectors.
+  '''
+  # the shorter string is the pattern, keeping the bit vectors small
+  if len(s) > len(t):
+    s, t = t, s
+  m = len(s)
+  if m == 0:
+    return len(t)
+
+  # bit i of peq[c] is set when s[i] == c
+  peq = {}
+  for (i, c) in enumerate(s):
+    peq[c] = peq.get(c, 0) | (1 << i)
+
+  mask = (1 << m) - 1
+  high = 1 << (m - 1)
+  pv, mv, score = mask, 0, m
+  for c in t:
+    eq = peq.get(c, 0)
+    xv = eq | mv
+    xh = (((eq & pv) + pv) ^ pv) | eq
+    ph = (mv | ~(xh | pv)) & mask
+    mh = pv & xh
+    # the last row of the column tracks the distance to the prefix of t
+    if ph & high:
+      score += 1
+    elif mh & high:
+      score -= 1
+    ph = ((ph << 1) | 1) & mask
+    mh = (mh << 1) & mask
+    pv = (mh | ~(xv | ph)) & mask
+    mv = ph & xv
+
+  return score
+
+# edit distance implementations editDistance can dispatch to
+EDIT_BACKENDS = { "dp"    : dpEditDistance,
+                  "myers" : myersEditDistance
+}
+EDIT_BACKEND = "myers"
+
+def setEditBackend(name):
+  '''
+  Selects the implementation in EDIT_BACKENDS used by editDistance. Returns True if
+  succesfull, False if there is no backend called name.
+  '''
+  global EDIT_BACKEND
+  if name in EDIT_BACKENDS:
+    EDIT_BACKEND = name
+    return True
+  else:
+    return False
+
+def editDistance(s,t):
+  '''
+  Calculates the smallest number of deletions, insertions, or letter changes 
+  required to convert the string s into the string t, using the selected backend
+  '''
+  return EDIT_BACKENDS[EDIT_BACKEND](s,t)
+
+def boundedEditDistance(s,t,k):
+  '''
+  Returns editDistance(s,t) if it is at most k, and k + 1 otherwise. Only the band
+  of cells within k of the diagonal is computed (Ukkonen), and the computation
+  stops as soon as a whole row exceeds k. Wide bands are left to editDistance.
+  '''
+  n, m = len(s), len(t)
+  big = k + 1
+  if abs(n - m) > k:
+    return big
+  elif 4*k >= min(n, m):
+    return min(editDistance(s,t), big)
+
+  prev = [j if j <= k else big for j in range(m + 1)]
+  for i in range(1, n + 1):
+    lo, hi = max(1, i - k), min(m, i + k)
+    cur = [big]*(m + 1)
+    cur[lo - 1] = i if (lo == 1 and i <= k) else big
+    rowMin = cur[lo - 1]
+    si = s[i - 1]
+    for j in range(lo, hi + 1):
+      # same recurrence as dpEditDistance, capped at k + 1
+      v = prev[j - 1] + (si != t[j - 1])
+      if prev[j] + 1 < v:
+        v = prev[j] + 1
+      if cur[j - 1] + 1 < v:
+        v = cur[j - 1] + 1
+      cur[j] = v if v < big else big
+      if cur[j] < rowMin:
+        rowMin = cur[j]
+
+    # every path to the last cell crosses this row
+    if rowMin > k:
+      return big
+    prev = cur
+
+  return prev[m]
+
+def distanceLimit(m, bound, inclusive=False):
+  '''
+  Returns the largest distance d (at most m) for which d/m is below bound, or at most
+  bound if inclusive. Returns -1 if there is no such distance. Uses the same float
+  division as stringMatchDec so both agree exactly on the boundary.
+  '''
+  def within(d):
+    return (d/m <= bound) if inclusive else (d/m < bound)
+
+  d = max(-1, min(m, int(bound*m)))
+  while d >= 0 and not within(d):
+    d -= 1
+  while d < m and within(d + 1):
+    d += 1
+  return d
+
+def boundedMatchDec(s1,s2,bound,inclusive=False):
+  '''
+  Returns stringMatchDec(s1,s2) if it is below bound (or equal to it if inclusive),
+  None otherwise. Comparisons that cannot make it under bound are abandoned early.
+  '''
+  m = max(len(s1),len(s2))
+  k = distanceLimit(m, bound, inclusive)
+  if k < 0:
+    return None
+  d = boundedEditDistance(s1,s2,k)
+  return (d/m if d <= k else None)
+
 def stringMatchDec(s1,s2):
   '''
   Returns how closely two strings match in decimal format
@@ -96,24 +224,64 @@ def minIndex(lst):
 def numWords(s):
   return(len(s.split(" ")))
 
-def cleanName(name, upper=True): 
+# soundex digit of each consonant. Vowels (and Y) separate repeated digits, while H
+# and W do not, and any other character is dropped
+SOUNDEX_CODES = dict([(c, d) for (letters, d) in [("BFPV", "1"), ("CGJKQSXZ", "2"),
+                     ("DT", "3"), ("L", "4"), ("MN", "5"), ("R", "6")] for c in letters] +
+                     [(c, "") for c in "AEIOUY"])
+
+def soundex(word):
+  '''
+  Returns the four character American Soundex code of word (its first letter followed
+  by the digits of the next distinct consonant sounds), or '' if word has no letters.
+  '''
+  letters = [c for c in word.upper() if c in SOUNDEX_CODES or c in "HW"]
+  if len(letters) == 0:
+    return ''
+
+  code = letters[0]
+  last = SOUNDEX_CODES.get(letters[0], '')
+  for c in letters[1:]:
+    if c in "HW":
+      continue
+    d = SOUNDEX_CODES[c]
+    if d != '' and d != last:
+      code += d
+    last = d
+
+  return (code + "000")[:4]
+
+def phoneticKey(s):
   '''
-  Removes all non-characters from name
+  Returns the soundex codes of the words of s, separated by spaces.
   '''
-  def removeExtraSpace(sname):
-    try:
-      if sname[-1] == " ":
-        return(removeExtraSpace(sname[0:len(sname)-1]))
-      elif sname[0] == " ":
-        return(removeExtraSpace(sname[1:len(sname)]))
-      else:
-        return(sname)
+  return(" ".join(soundex(w) for w in s.split(' ')))
 
-    except IndexError:
-      return(sname)
+# symbols (and spaces) at the end of a name
+TRAILING_SYMBOLS = re.compile(r"\W+$")
+# number of distinct (name, upper, fold) cleanings remembered by cleanName
+CLEAN_CACHE_SIZE = 65536
+# bumped whenever what cleanName returns changes, so that whatever was saved keyed on
+# cleaned names (student snapshots, aliases) is rebuilt
+CLEAN_VERSION = 2
 
-  # remove extraneous symbols and upper
-  cName = re.sub(r'\W+( \W+)*$', '', name).upper() if upper else re.sub(r'\W+( \W+)*$', '', name)
+def cleanName(name, upper=True, fold=None): 
+  '''
+  Removes all non-characters from the end of name, collapses its whitespace into single
+  spaces and, if upper, upper cases it. If fold (by default, if upper) accents are
+  removed too, so that names compared by a group match regardless of them. Results
+  are remembered and interned, as every roster row and sheet cell is cleaned.
+  '''
+  return cleanNameCached(name, upper, upper if fold is None else fold)
+
+@lru_cache(maxsize=CLEAN_CACHE_SIZE)
+def cleanNameCached(name, upper, fold):
+  '''
+  Uncached cleanName, see above
+  '''
+  if fold:
+    name = "".join(c for c in unicodedata.normalize("NFKD", name) if not unicodedata.combining(c))
 
-  # remove extra spaces at the beginning and end
-  return(removeExtraSpace(name))
+  # remove extraneous symbols and spaces, and upper
+  cName = " ".join(TRAILING_SYMBOLS.sub("", name).split())
+  return sys.intern(cName.upper() if upper else cName)
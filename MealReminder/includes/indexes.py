@@ -0,0 +1,422 @@
+from collections import Counter
+from includes.functions import *
+
+# numpy is optional, and only needed by the "vector" matcher
+try:
+  import numpy
+except ImportError:
+  numpy = None
+
+'''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''
+Name Indexes Used by Group to Resolve Partially Matching Names
+'''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''
+# length of the character grams used by NgramIndex. At ERR_TOL = 0.50 trigrams leave
+# the count filter at zero for most name lengths, while bigrams still prune
+NGRAM_SIZE = 2
+def toleranceRadius(n, tol, inclusive=False):
+  '''
+  Returns the largest edit distance d for which a string of length n can still be
+  within tol of some other string (or at tol if inclusive), or None if every distance
+  can be. Since the other string has at most n + d characters, d/(n + d) < tol must hold.
+  '''
+  if tol >= 1:
+    return None
+
+  d = 0
+  while ((d + 1)/(n + d + 1) <= tol) if inclusive else ((d + 1)/(n + d + 1) < tol):
+    d += 1
+  return d
+
+class LinearIndex(object):
+  '''
+  Reference index which compares a word against every indexed word, in the order
+  they were added. Every other index must return exactly what this one does.
+  '''
+  def __init__(self):
+    self.words = []
+    self.positions = []
+
+  def add(self, word, position):
+    '''
+    Indexes word as belonging to the member at position.
+    '''
+    self.words.append(word)
+    self.positions.append(position)
+
+  def candidates(self, word, tol):
+    '''
+    Returns the indexed words which could be within tol of word.
+    '''
+    return self.words
+
+  def closest(self, word, tol):
+    '''
+    Returns the (score, position) of the closest indexed word, with ties going to
+    the earliest position, or None if no word is within tol of word.
+    '''
+    if len(self.words) == 0:
+      return None
+
+    scores = [stringMatchDec(word, t) for t in self.words]
+    ind = minIndex(scores)
+    return((scores[ind], self.positions[ind]) if scores[ind] < tol else None)
+
+class BoundedIndex(LinearIndex):
+  '''
+  Linear index which abandons each comparison as soon as it cannot beat the best
+  score found so far, starting from the tolerance itself.
+  '''
+  def closest(self, word, tol):
+    '''
+    Returns the (score, position) of the closest indexed word, with ties going to
+    the earliest position, or None if no word is within tol of word.
+    '''
+    best = None
+    bound = tol
+    for (t, position) in zip(self.words, self.positions):
+      # later words have to be strictly better to replace an earlier best
+      score = boundedMatchDec(word, t, bound)
+      if score is not None:
+        best = (score, position)
+        bound = score
+
+    return best
+
+class LengthIndex(object):
+  '''
+  Index of words bucketed by length. Since the length difference of two words is a
+  lower bound on their edit distance, buckets whose length is too far from the query
+  to be within tolerance (or to beat the best match so far) are skipped whole.
+  '''
+  def __init__(self):
+    self.positions = {}
+    # length -> [(word, position)] in the order words were added
+    self.buckets = {}
+
+  def add(self, word, position):
+    '''
+    Indexes word as belonging to the member at position. A word that is already
+    indexed keeps its earliest position.
+    '''
+    if word in self.positions:
+      return
+
+    self.positions[word] = position
+    self.buckets.setdefault(len(word), []).append((word, position))
+
+  def candidates(self, word, tol):
+    '''
+    Returns the indexed words which could be within tol of word.
+    '''
+    n = len(word)
+    return [t for (m, bucket) in self.buckets.items()
+            if abs(n - m) <= distanceLimit(max(n, m), tol) for (t, position) in bucket]
+
+  def closest(self, word, tol):
+    '''
+    Returns the (score, position) of the closest indexed word, with ties going to
+    the earliest position, or None if no word is within tol of word.
+    '''
+    n = len(word)
+    best = None
+    bound, inclusive = tol, False
+
+    # nearest lengths first, as they are the likeliest to tighten the bound early
+    for m in sorted(self.buckets, key=lambda m: abs(m - n)):
+      if abs(n - m) > distanceLimit(max(n, m), bound, inclusive):
+        continue
+
+      for (t, position) in self.buckets[m]:
+        # an earlier position could still tie with best, so keep equal scores
+        score = boundedMatchDec(word, t, bound, inclusive)
+        if score is not None and (best is None or (score, position) < best):
+          best = (score, position)
+          bound, inclusive = score, True
+
+    return best
+
+def ngrams(word, q):
+  '''
+  Returns the multiset (as a Counter) of q character long substrings of word, padded
+  with q - 1 sentinels on both ends so that a word of length n has n + q - 1 of them.
+  '''
+  padded = "\0"*(q - 1) + word + "\0"*(q - 1)
+  return Counter(padded[i:i + q] for i in range(len(word) + q - 1))
+
+class NgramIndex(object):
+  '''
+  Inverted index from character q-grams to the indexed words containing them. Two
+  words within edit distance k of each other, the longer of length M, share at least
+  M + q - 1 - k*q grams, so only words sharing that many grams with the query are
+  ever compared. Words of lengths for which the bound is not positive cannot be
+  filtered this way and are always compared.
+  '''
+  def __init__(self, q=NGRAM_SIZE):
+    self.q = q
+    self.ids = {}
+    self.words = []
+    self.positions = []
+    # gram -> {word id: occurences of gram in word}
+    self.postings = {}
+    # length -> ids of the words of that length
+    self.byLength = {}
+
+  def add(self, word, position):
+    '''
+    Indexes word as belonging to the member at position. A word that is already
+    indexed keeps its earliest position.
+    '''
+    if word in self.ids:
+      return
+
+    i = len(self.words)
+    self.ids[word] = i
+    self.words.append(word)
+    self.positions.append(position)
+    self.byLength.setdefault(len(word), []).append(i)
+    for (g, c) in ngrams(word, self.q).items():
+      self.postings.setdefault(g, {})[i] = c
+
+  def candidates(self, word, tol):
+    '''
+    Returns the indexed words which could be within tol of word.
+    '''
+    return [self.words[i] for i in self.candidateIds(word, tol)]
+
+  def candidateIds(self, word, tol):
+    '''
+    Returns the ids of the indexed words which pass the count filter for word, that
+    is every word which could be within tol of it.
+    '''
+    n, q = len(word), self.q
+
+    # grams needed by length, for lengths that can be within tol at all
+    needed = {}
+    for m in self.byLength:
+      k = distanceLimit(max(n, m), tol)
+      if abs(n - m) <= k:
+        needed[m] = max(n, m) + q - 1 - k*q
+
+    shared = {}
+    for (g, c) in ngrams(word, q).items():
+      for (i, cw) in self.postings.get(g, {}).items():
+        shared[i] = shared.get(i, 0) + min(c, cw)
+
+    ids = [i for (i, c) in shared.items()
+           if 0 < needed.get(len(self.words[i]), c + 1) <= c]
+    for (m, need) in needed.items():
+      if need <= 0:
+        ids.extend(self.byLength[m])
+    return ids
+
+  def closest(self, word, tol):
+    '''
+    Returns the (score, position) of the closest indexed word, with ties going to
+    the earliest position, or None if no word is within tol of word.
+    '''
+    return self.closestAmong(self.candidateIds(word, tol), word, tol)
+
+  def closestAmong(self, ids, word, tol):
+    '''
+    Same as closest, but only considering the indexed words with the given ids.
+    '''
+    best = None
+    bound = tol
+    for i in sorted(ids):
+      # ids follow positions, so later words have to be strictly better
+      score = boundedMatchDec(word, self.words[i], bound)
+      if score is not None:
+        best = (score, self.positions[i])
+        bound = score
+
+    return best
+
+class PhoneticIndex(NgramIndex):
+  '''
+  N-gram index which first only compares the words sharing the query's phonetic key
+  (see phoneticKey), and falls back to the whole index when none of them is within
+  tolerance. Unlike the other indexes, a word in the phonetic bucket is returned
+  even if a word outside of it is closer to the query.
+  '''
+  def __init__(self, q=NGRAM_SIZE):
+    NgramIndex.__init__(self, q)
+    # phonetic key -> ids of the words with that key
+    self.keys = {}
+
+  def add(self, word, position):
+    '''
+    Indexes word as belonging to the member at position. A word that is already
+    indexed keeps its earliest position.
+    '''
+    if word in self.ids:
+      return
+
+    NgramIndex.add(self, word, position)
+    self.keys.setdefault(phoneticKey(word), []).append(self.ids[word])
+
+  def closest(self, word, tol):
+    '''
+    Returns the (score, position) of the closest word sharing the phonetic key of
+    word, or of the closest indexed word if there is none within tol of word.
+    '''
+    match = self.closestAmong(self.keys.get(phoneticKey(word), []), word, tol)
+    return(match if match is not None else NgramIndex.closest(self, word, tol))
+
+def encodeWords(words):
+  '''
+  Encodes words into a (len(words), longest) matrix of code points, padded with -1,
+  and the vector of their lengths.
+  '''
+  lengths = numpy.array([len(w) for w in words], dtype=numpy.int32)
+  codes = numpy.full((len(words), max(lengths, default=0)), -1, dtype=numpy.int32)
+  for (i, w) in enumerate(words):
+    codes[i, :len(w)] = [ord(c) for c in w]
+  return(codes, lengths)
+
+def batchMatchDec(word, codes, lengths):
+  '''
+  Returns the array of stringMatchDec(word, w) for every w encoded by encodeWords.
+  The DP matrix is swept one row (character of word) at a time for all words at
+  once. Within a row D[j] = min(T[j], D[j-1] + 1), which unrolls to
+  j + min(T[k] - k for k <= j), so the sweep is a running minimum.
+  '''
+  cols = numpy.arange(codes.shape[1] + 1, dtype=numpy.int32)
+  prev = numpy.tile(cols, (codes.shape[0], 1))
+  for (i, c) in enumerate(word, 1):
+    row = numpy.empty_like(prev)
+    row[:, 0] = i
+    row[:, 1:] = numpy.minimum(prev[:, 1:] + 1, prev[:, :-1] + (codes != ord(c)))
+    prev = numpy.minimum.accumulate(row - cols, axis=1) + cols
+
+  distances = prev[numpy.arange(codes.shape[0]), lengths]
+  return(distances/numpy.maximum(lengths, len(word)))
+
+class VectorIndex(LinearIndex):
+  '''
+  Linear index which scores a word against all indexed words in one numpy batch.
+  The words are encoded once, on the first lookup after they change.
+  '''
+  def __init__(self):
+    LinearIndex.__init__(self)
+    self.encoded = None
+
+  def add(self, word, position):
+    '''
+    Indexes word as belonging to the member at position.
+    '''
+    LinearIndex.add(self, word, position)
+    self.encoded = None
+
+  def closest(self, word, tol):
+    '''
+    Returns the (score, position) of the closest indexed word, with ties going to
+    the earliest position, or None if no word is within tol of word.
+    '''
+    if len(self.words) == 0:
+      return None
+    if self.encoded is None:
+      self.encoded = encodeWords(self.words)
+
+    scores = batchMatchDec(word, *self.encoded)
+    ind = int(numpy.argmin(scores))
+    return((float(scores[ind]), self.positions[ind]) if scores[ind] < tol else None)
+
+class BKTree(object):
+  '''
+  Burkhard-Keller tree over edit distance. Each node is a (word, position, children)
+  tuple where children maps edit distances to subtrees, so the triangle inequality
+  lets a lookup skip every subtree that cannot be within tolerance.
+  '''
+  def __init__(self):
+    self.root = None
+
+  def add(self, word, position):
+    '''
+    Indexes word as belonging to the member at position. A word that is already
+    indexed keeps its earliest position.
+    '''
+    if self.root is None:
+      self.root = (word, position, {})
+      return
+
+    node = self.root
+    while True:
+      d = editDistance(word, node[0])
+      if d == 0:
+        return
+      elif d in node[2]:
+        node = node[2][d]
+      else:
+        node[2][d] = (word, position, {})
+        return
+
+  def candidates(self, word, tol):
+    '''
+    Returns the indexed words which could be within tol of word.
+    '''
+    radius = toleranceRadius(len(word), tol)
+    found = []
+    stack = [self.root] if self.root is not None else []
+    while stack:
+      (nodeWord, position, children) = stack.pop()
+      if radius is None:
+        found.append(nodeWord)
+        stack.extend(children.values())
+        continue
+
+      limit = radius + max(children, default=0)
+      d = boundedEditDistance(word, nodeWord, limit)
+      if d <= radius:
+        found.append(nodeWord)
+      stack.extend(child for (e, child) in children.items() if abs(e - d) <= radius)
+
+    return found
+
+  def closest(self, word, tol):
+    '''
+    Returns the (score, position) of the closest indexed word, with ties going to
+    the earliest position, or None if no word is within tol of word.
+    '''
+    if self.root is None:
+      return None
+
+    n = len(word)
+    radius = toleranceRadius(n, tol)
+    best = None
+    stack = [self.root]
+    while stack:
+      (nodeWord, position, children) = stack.pop()
+      if radius is None:
+        d = editDistance(word, nodeWord)
+      else:
+        # past this distance neither the node nor any of its children can match
+        limit = radius + max(children, default=0)
+        d = boundedEditDistance(word, nodeWord, limit)
+        if d > limit:
+          continue
+
+      score = d/max(n, len(nodeWord))
+      if score < tol and (best is None or (score, position) < best):
+        best = (score, position)
+        # an earlier position could still tie with best, so keep equal scores
+        radius = toleranceRadius(n, score, inclusive=True)
+
+      # only subtrees whose edge is within radius of d can hold a match
+      stack.extend(child for (e, child) in children.items()
+                   if radius is None or abs(e - d) <= radius)
+
+    return best
+
+# maps matcher names accepted by Group to the index used for each name form
+MATCHERS = {  "linear"  : LinearIndex,
+              "bounded" : BoundedIndex,
+              "bktree"  : BKTree,
+              "length"  : LengthIndex,
+              "ngram"   : NgramIndex,
+              "phonetic": PhoneticIndex
+}
+if numpy is not None:
+  MATCHERS["vector"] = VectorIndex
+
+# matchers which, by design, can return another match than the linear one
+APPROXIMATE_MATCHERS = ("phonetic",)
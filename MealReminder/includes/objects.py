@@ -1,10 +1,20 @@
 import smtplib
 import re
-import xlrd
+import os
+import sys
+import hashlib
+import sqlite3
+import pickle
 import datetime
+from bisect import bisect_left, bisect_right
+from heapq import heappush, heapreplace
+from concurrent.futures import ProcessPoolExecutor
+from collections import OrderedDict, namedtuple
 from email.mime.text import MIMEText 
 from email.mime.multipart import MIMEMultipart
 from includes.functions import *
+from includes.indexes import MATCHERS
+from includes.sheets import openSheet
 
 # regex for email checks
 EMAIL_REGEX = re.compile(r"[^@]+@[^@]+\.[^@]+")
@@ -14,12 +24,25 @@ DATE_REGEX = re.compile(r"^(0?[1-9]|1[0-2])/(0?[1-9]|[12][0-9]|3[01])$")
 
 # specifies tolerance for error when matching names
 ERR_TOL = 0.50 # value from 1 to 2, with 1 requiring perfect match, and 2 not comparing
-# contants for the date,row tuple we use
-DATE = 0
-ROW = 1
+# default number of resolved names each group remembers
+CACHE_SIZE = 4096
+# fewest names left to match for Group.resolveMany to start worker processes, below
+# which starting them and copying the group to them costs more than they save
+POOL_MIN_NAMES = 100
+# attributes of a group that are built from its members, as saved by Group.snapshot
+MEMBER_STATE = ("size", "members", "holders", "matcher", "indexes")
+# word of a name each member index is built on, as passed to ithWord (-1 is the full name)
+FULL = -1
+FIRST = 1
+LAST = 0
+# names of the forms a name can be matched on, as reported by Group.resolve
+STRATEGIES = {FULL: "full", FIRST: "first", LAST: "last"}
 
 EARLIEST_TIME = (7,0)
-LATEST_TIME = (18,0)
+# bumped whenever the layout of a DateIndex changes, so that saved ones are rebuilt
+DATE_INDEX_VERSION = 1
+# how long a meal shift lasts from the time of its Duty
+DUTY_LENGTH = datetime.timedelta(hours=1)
 
 class MailServer(object):
   '''
@@ -109,53 +132,429 @@ class Student(object):
   '''
   A student class to keep track of first name, last name, and email for a student
   '''
+  # no per instance dictionary, as groups can hold tens of thousands of students
+  __slots__ = ("name", "email")
+
   def __init__(self,name,email):
     '''
-    Student name and email in default input formats. 
+    Student name and email in default input formats. The cleaned name is interned (see
+    cleanName), so it is the same string object as the group's key for the student.
     '''
     self.name = cleanName(name)
     self.email = email if EMAIL_REGEX.match(email) else None
 
+class AliasStore(object):
+  '''
+  An sqlite file remembering which member each cleaned name resolved to, for a given
+  Group.fingerprint, so that later runs against the same members skip matching. Groups
+  sharing a file keep their aliases apart by group name. The file is only a cache:
+  if it cannot be used, a warning is printed and names are matched without it.
+  '''
+  def __init__(self, filePath):
+    self.filePath = filePath
+    try:
+      self.connection = sqlite3.connect(filePath)
+      with self.connection:
+        # aliases of files written before they were kept per group are dropped
+        self.connection.execute("DROP TABLE IF EXISTS aliases")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS group_aliases (roster TEXT, fingerprint TEXT, "
+                                "alias TEXT, name TEXT, score REAL, strategy TEXT, "
+                                "PRIMARY KEY (roster, fingerprint, alias))")
+    except sqlite3.Error as e:
+      self.disable(e)
+
+  def disable(self, error):
+    '''
+    Stops using the file after error, warning about it.
+    '''
+    print("Warning. Could not use the aliases in {} ({}), matching names without them.".format(
+          self.filePath, error))
+    try:
+      self.connection.close()
+    except (sqlite3.Error, AttributeError):
+      pass
+    self.connection = None
+
+  def lookup(self, roster, fingerprint, cNames):
+    '''
+    Returns a dictionary of cleaned name: (name, score, strategy) for each of cNames
+    stored for the group named roster under fingerprint. A name that matched nobody
+    maps to (None, None, None).
+    '''
+    found = {}
+    if self.connection is None:
+      return found
+
+    try:
+      for cName in cNames:
+        row = self.connection.execute("SELECT name, score, strategy FROM group_aliases WHERE roster = ? "
+                                      "AND fingerprint = ? AND alias = ?",
+                                      (roster, fingerprint, cName)).fetchone()
+        if row is not None:
+          found[cName] = row
+    except sqlite3.Error as e:
+      self.disable(e)
+      return {}
+    return found
+
+  def store(self, roster, fingerprint, rows):
+    '''
+    Saves (cleaned name, name, score, strategy) rows for the group named roster under
+    fingerprint, dropping the rows of its older fingerprints, which were resolved
+    against members it no longer has.
+    '''
+    if self.connection is None:
+      return
+
+    try:
+      with self.connection:
+        self.connection.execute("DELETE FROM group_aliases WHERE roster = ? AND fingerprint != ?",
+                                (roster, fingerprint))
+        self.connection.executemany("INSERT OR REPLACE INTO group_aliases VALUES (?, ?, ?, ?, ?, ?)",
+                                    [(roster, fingerprint) + tuple(row) for row in rows])
+    except sqlite3.Error as e:
+      self.disable(e)
+
+  def close(self):
+    '''
+    Closes the underlying file
+    '''
+    if self.connection is not None:
+      self.connection.close()
+      self.connection = None
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    self.close()
+    return False
+
+class Roster(object):
+  '''
+  Students keyed by cleaned name, in the order they were added. Supports O(1)
+  membership tests, lookups by name and lookups by position.
+  '''
+  def __init__(self):
+    self.names = []
+    self.students = []
+    self.positions = {}
+
+  def __len__(self):
+    return len(self.names)
+
+  def __contains__(self, name):
+    return name in self.positions
+
+  def __getitem__(self, name):
+    return self.students[self.positions[name]]
+
+  def __iter__(self):
+    return iter(self.names)
+
+  def at(self, position):
+    '''
+    Returns the (name, student) added at position
+    '''
+    return(self.names[position], self.students[position])
+
+  def add(self, name, student):
+    '''
+    Adds student under name. Returns True if succesfull, False if name already exists.
+    '''
+    if name in self.positions:
+      return False
+
+    self.positions[name] = len(self.names)
+    self.names.append(name)
+    self.students.append(student)
+    return True
+
+def rowDate(val):
+  '''
+  Returns the mm/dd date of a value of the first column of the schedule sheet, which
+  is its last word, or None if it holds no date. ithWord(x,0) brings you the 0th word
+  '''
+  dateStr = str(ithWord(str(val),0))
+  return dateStr if DATE_REGEX.match(dateStr) else None
+
+def dateKey(dateStr):
+  '''
+  Returns the (month, day) of a mm/dd date, which sorts dates of a year in order.
+  '''
+  month, day = dateStr.split("/")
+  return (int(month), int(day))
+
+def dateWindow(time, timeRange):
+  '''
+  Returns the (month, day) keys lo, hi such that the days from the day of time until
+  time + timeRange (counting a day from EARLIEST_TIME), in the year of time, are the
+  ones with lo <= key < hi.
+  '''
+  lim = time + timeRange
+  lo = (time.month, time.day)
+  if lim.year < time.year:
+    return (lo, lo)
+  elif lim.year > time.year:
+    return (lo, (13, 0))
+  elif (lim.hour, lim.minute, lim.second, lim.microsecond) > EARLIEST_TIME + (0, 0):
+    return (lo, (lim.month, lim.day + 1))
+  else:
+    return (lo, (lim.month, lim.day))
+
+def existsIn(year, month, day):
+  '''
+  Returns True if month/day is a date of year, which 2/29 or 4/31 may not be.
+  '''
+  try:
+    datetime.date(year, month, day)
+    return True
+  except ValueError:
+    return False
+
+class DateIndex(object):
+  '''
+  The rows of the schedule sheet with a mm/dd date as the last word of their first
+  column, sorted by date, so that the rows of a span of days are found by binary
+  search instead of parsing the date of every row.
+  '''
+  def __init__(self, dated):
+    '''
+    dated - the ((month, day), row index, mm/dd date) of every dated row of the sheet.
+    '''
+    # sheets are kept in date order, but sorting guards against the odd one out
+    dated = sorted(dated)
+    self.keys = [key for (key, row, dateStr) in dated]
+    self.rows = [(row, dateStr) for (key, row, dateStr) in dated]
+
+  def __len__(self):
+    return len(self.keys)
+
+  def between(self, time, timeRange):
+    '''
+    Returns the (row index, mm/dd date) of the rows dated within dateWindow(time,
+    timeRange), in sheet order.
+    '''
+    lo, hi = dateWindow(time, timeRange)
+    lo, hi = bisect_left(self.keys, lo), bisect_left(self.keys, hi)
+    return sorted(row for ((month, day), row) in zip(self.keys[lo:hi], self.rows[lo:hi])
+                  if existsIn(time.year, month, day))
+
+class DutyIndex(object):
+  '''
+  Every duty assigned in the schedule sheet, as (name, (mm/dd date, duty)), sorted
+  by when it starts, so that the duties of any window of time are found by binary
+  search. Shifts all last DUTY_LENGTH, so the duties under way at some time are the
+  ones starting less than DUTY_LENGTH before it.
+  '''
+  def __init__(self, rows):
+    '''
+    rows - the (mm/dd date, row values) of the dated rows of the sheet. Cells may hold
+    several names, separated by two spaces. Empty cells are ignored.
+    '''
+    duties = []
+    for (dateStr, row) in rows:
+      month, day = dateKey(dateStr)
+      for (minute, (i, duty)) in zip(DUTY_MINUTES, DUTY_COLUMNS):
+        cell = row[i] if i < len(row) else ''
+        if not isinstance(cell, str):
+          continue
+        for name in cell.split("  "):
+          name = cleanName(name, upper=False)
+          if name != '':
+            duties.append(((month, day, minute), (name, (dateStr, duty))))
+
+    # stable, so duties starting together stay in sheet order
+    duties.sort(key=lambda entry: entry[0])
+    self.keys = [key for (key, entry) in duties]
+    self.duties = [entry for (key, entry) in duties]
+
+  def __len__(self):
+    return len(self.keys)
+
+  def between(self, start, end):
+    '''
+    Returns the (name, (mm/dd date, duty)) of the duties starting from start until end,
+    to the minute, in the year of start and in time order.
+    '''
+    if end.year < start.year:
+      return []
+
+    lo = bisect_left(self.keys, (start.month, start.day, 60*start.hour + start.minute))
+    if end.year > start.year:
+      hi = len(self.keys)
+    else:
+      hi = bisect_right(self.keys, (end.month, end.day, 60*end.hour + end.minute))
+    return [entry for (key, entry) in zip(self.keys[lo:hi], self.duties[lo:hi])
+            if existsIn(start.year, key[0], key[1])]
+
+  def at(self, time):
+    '''
+    Returns the (name, (mm/dd date, duty)) of the duties under way at time, to the minute.
+    '''
+    time = time.replace(second=0, microsecond=0)
+    return self.between(time - DUTY_LENGTH + datetime.timedelta(minutes=1), time)
+
+# result of Group.resolve: the matched member's name in the group and Student object,
+# the stringMatchDec score of the match and the strategy in STRATEGIES it matched by
+Match = namedtuple("Match", ["name", "member", "score", "strategy"])
+
+# group matched against by the resolveMany workers of this process
+workerGroup = None
+
+def initWorker(group):
+  '''
+  Runs once in every resolveMany worker process, with its copy of the group.
+  '''
+  global workerGroup
+  workerGroup = group
+
+def locateChunk(cNames):
+  '''
+  Locates each of the cleaned names cNames in the group of this worker process.
+  '''
+  return [workerGroup.locate(cName) for cName in cNames]
+
 class Group(object): 
   ''' 
   A group class keeps track of a group of students, and provides membership and 
   lookup functions for students 
   '''
-  def __init__(self,name = "REU",eFile = "", eSheet = ""): 
+  def __init__(self,name = "REU",eFile = "", eSheet = "", matcher = "ngram", cacheSize = CACHE_SIZE,
+               aliases = None, sheetEngine = None, indexFile = None): 
     self.name = name 
     self.size = 0
   
-    # keep track of student objects by full names 
-    self.members = {} 
-  
-    # keep track of names of student objects 
-    self.memberNames = []  
+    # keep track of student objects by full names, in the order they were added
+    self.members = Roster() 
+
+    # word -> positions of the members having it, per name form
+    self.holders = {FULL: {}, FIRST: {}, LAST: {}}
+
+    # one index per name form, holding the position of members in members
+    self.matcher = matcher
+    self.indexes = {form: MATCHERS[matcher]() for form in (FULL, FIRST, LAST)}
+
+    # least recently used cache of cleaned name -> Match (or None), cleared
+    # whenever the members change
+    self.cache = OrderedDict()
+    self.cacheSize = cacheSize
+    self.cacheHits = 0
+    self.cacheMisses = 0
+
+    # optional AliasStore remembering resolved names across runs, under the group name
+    self.aliases = aliases
+    self.rosterHash = None
 
     # external data on members stored here
     self.extFile = eFile
     self.extSheet = eSheet
+
+    # reader from SHEET_ENGINES for the sheet, or None to pick one from the file type
+    self.sheetEngine = sheetEngine
+
+    # DateIndex and DutyIndex of the sheet, by class, and the state of the file they
+    # were built from
+    self.scheduleIndex = {}
+    self.scheduleKey = None
+
+    # file the DateIndex of the sheet is saved to, to be reused by later runs, if any
+    self.indexFile = indexFile
   
+  def __getstate__(self):
+    '''
+    Copies of the group (for worker processes or on disk) leave the alias store, the
+    cache of resolved names and the indexes of the sheet behind, keeping what locate
+    needs.
+    '''
+    state = self.__dict__.copy()
+    state['aliases'] = None
+    state['cache'] = OrderedDict()
+    state['scheduleIndex'] = {}
+    state['scheduleKey'] = None
+    return state
+
   def addMember(self,member): 
     ''' 
     Creates a link between fullname and the student object. Returns True if  
     succesfull, False if student already exists. Cleans the name.  
     '''
-    cName = cleanName(member.name)
-    if cName not in self.members and cName not in self.memberNames: 
-      self.members[cleanName(cName)] = member 
-      self.memberNames.append(cName)
+    return (len(self.addMembers([member])) == 0)
+
+  def addMembers(self,members):
+    '''
+    Adds each student of members as addMember would, in order, and returns the list
+    of students that were not added because a student with their name already exists.
+    '''
+    duplicates = []
+    for member in members:
+      cName = cleanName(member.name)
+      if not self.members.add(cName, member):
+        duplicates.append(member)
+        continue
+
+      # interned, so members sharing a first or last word share one string
+      for (form, word) in self.nameForms(cName)[1].items():
+        word = sys.intern(word)
+        self.indexes[form].add(word, self.size)
+        self.holders[form].setdefault(word, []).append(self.size)
       self.size += 1 
-      return True
-    else: 
-      return False
+
+    if len(duplicates) < len(members):
+      self.cache.clear()
+      self.rosterHash = None
+    return duplicates
+
+  def snapshot(self):
+    '''
+    Returns the members of the group along with everything built from them (see
+    MEMBER_STATE), so that they can be saved and given to restore later on.
+    '''
+    return {attr: getattr(self, attr) for attr in MEMBER_STATE}
+
+  def restore(self,state):
+    '''
+    Replaces the members of the group with the ones of a snapshot.
+    '''
+    for attr in MEMBER_STATE:
+      setattr(self, attr, state[attr])
+    self.cache.clear()
+    self.rosterHash = None
+
+  def nameForms(self,cName):
+    '''
+    Splits the cleaned name cName once, and returns its number of words along with
+    a dictionary from each form to its word (the full name, the first word as
+    ithWord(cName,1) and the last word as ithWord(cName,0)).
+    '''
+    words = cName.split(' ')
+    return(len(words), {FULL: cName, FIRST: words[0], LAST: words[-1]})
   
   def isMember(self,name): 
     ''' 
     Returns true if name partially matches a memeber, false otherwise 
     '''
-    return (self.fullName(name) is not None) 
+    return (self.resolve(name) is not None) 
   
   def fullName(self,name): 
+    ''' 
+    Returns the name of the member partially matching name (see resolve), or returns
+    None if no member matches 
+    '''
+    match = self.resolve(name)
+    return (match.name if match is not None else None)
+
+  def findMemberr(self,name): 
+    ''' 
+    Finds a member and returns the member object if found. Otherwise, returns None 
+    '''
+    match = self.resolve(name)
+    if match is not None: 
+      return match.member
+    else: 
+      return None
+
+  def resolve(self,name): 
     ''' 
     Attempts to partially match name to a member of the group. Partial matching is as follows: 
     1. Attempts full match with non-characters removed with error tolerance. 
@@ -164,177 +563,309 @@ class Group(object):
     3. Attempts match from end of name to beginning with error tolerance. It at least entire last word 
         is matched, this is a partial match 
   
-    Return the name of the partially matched meber, or returns None if no member matches 
+    Return a Match for the partially matched meber, or returns None if no member matches 
     '''
-    #pdb.set_trace()
     # clean name 
     cName = cleanName(name) 
-      
-    # returns list of matched items based on index 
-    def matchList(i):
-      '''
-      Special list to match a specific word in a name with the passed in parameter.
-      ''' 
-      if i == -1: 
-        return list(map(lambda t : stringMatchDec(cName,t), self.memberNames)) 
-      else: 
-        return list(map(lambda t : stringMatchDec(ithWord(cName,i), t),  
-                        map(lambda s: ithWord(s,i), self.memberNames))) 
+    if cName in self.cache:
+      self.cacheHits += 1
+      self.cache.move_to_end(cName)
+      return self.cache[cName]
+
+    self.cacheMisses += 1
+    recalled = self.recallAliases([cName])
+    if cName in recalled:
+      return self.remember(cName, recalled[cName])
+
+    match = self.matchName(cName)
+    self.recordAliases({cName: match})
+    return self.remember(cName, match)
+
+  def topMatches(self,name,k):
+    '''
+    Returns the Matches of (at most) the k members closest to name, best first, with
+    ties going to the earliest added members. A member scores the best of its forms
+    that resolve would try for name, and only members within ERR_TOL are considered.
+    Candidates that cannot beat the k-th best match so far are abandoned early.
+    '''
+    cName = cleanName(name)
+    if cName == '' or k < 1:
+      return []
+
+    wordCount, forms = self.nameForms(cName)
+    best = {}
+    # on ties a member keeps the form seen first, which is the one locate prefers
+    for form in ((FULL,) if wordCount > 1 else ()) + (LAST, FIRST):
+      word = forms[form]
+      # the k best (score, position) so far, negated so the worst is heap[0]
+      heap = []
+      for t in set(self.indexes[form].candidates(word, ERR_TOL)):
+        if len(heap) < k:
+          score = boundedMatchDec(word, t, ERR_TOL)
+        else:
+          score = boundedMatchDec(word, t, -heap[0][0], inclusive=True)
+        if score is None:
+          continue
+
+        # holders are in position order, so once one misses the rest do too
+        for position in self.holders[form][t]:
+          if len(heap) < k:
+            heappush(heap, (-score, -position))
+          elif (-score, -position) > heap[0]:
+            heapreplace(heap, (-score, -position))
+          else:
+            break
+
+      for (score, position) in heap:
+        if -position not in best or -score < best[-position][0]:
+          best[-position] = (-score, form)
+
+    ranked = sorted(best.items(), key=lambda item: (item[1][0], item[0]))[:k]
+    return [self.matchAt((score, position, form)) for (position, (score, form)) in ranked]
+
+  def resolveMany(self,names,workers=None):
+    '''
+    Resolves every name in names, returning a dictionary of name: Match (or None).
+    Names are cleaned and deduplicated first, and the ones not in the cache are
+    split in chunks matched by a pool of workers processes (as many as there are
+    cpus by default, and never more than names). Each worker receives a copy of the
+    group once, when it starts. Unless workers is given, fewer than POOL_MIN_NAMES
+    names are matched in this process.
+    '''
+    cNames = {name: cleanName(name) for name in names}
+    matches = {cName: self.cache[cName] for cName in set(cNames.values()) if cName in self.cache}
+    pending = [cName for cName in set(cNames.values()) if cName not in matches]
+    self.cacheHits += len(cNames) - len(pending)
+    self.cacheMisses += len(pending)
+
+    # names resolved by earlier runs
+    recalled = self.recallAliases(pending)
+    pending = [cName for cName in pending if cName not in recalled]
+
+    if workers is None:
+      workers = (os.cpu_count() or 1) if len(pending) >= POOL_MIN_NAMES else 1
+    workers = min(workers, len(pending))
+
+    if workers <= 1:
+      located = map(self.locate, pending)
+    else:
+      # a few chunks per worker, so that slow chunks even out
+      nChunks = min(4*workers, len(pending))
+      chunks = [pending[i::nChunks] for i in range(nChunks)]
+      pending = [cName for chunk in chunks for cName in chunk]
+      with ProcessPoolExecutor(max_workers=workers, initializer=initWorker,
+                               initargs=(self,)) as pool:
+        located = [loc for chunk in pool.map(locateChunk, chunks) for loc in chunk]
+
+    found = {cName: self.matchAt(loc) for (cName, loc) in zip(pending, located)}
+    self.recordAliases(found)
+    for resolved in (recalled, found):
+      for (cName, match) in resolved.items():
+        matches[cName] = self.remember(cName, match)
+    return({name: matches[cName] for (name, cName) in cNames.items()})
+
+  def fingerprint(self):
+    '''
+    Returns a hash of the member names (in order) and of how they are matched, which
+    changes whenever a name could resolve differently.
+    '''
+    if self.rosterHash is None:
+      roster = "\n".join([self.matcher, repr(ERR_TOL), repr(CLEAN_VERSION)] + self.members.names)
+      self.rosterHash = hashlib.sha1(roster.encode("utf-8")).hexdigest()
+    return self.rosterHash
+
+  def recallAliases(self,cNames):
+    '''
+    Returns a dictionary of cleaned name: Match (or None) for the names in cNames
+    that the alias store has resolved against the current members.
+    '''
+    if self.aliases is None or len(cNames) == 0:
+      return {}
+
+    recalled = {}
+    for (cName, (name, score, strategy)) in self.aliases.lookup(self.name, self.fingerprint(), cNames).items():
+      if name is None:
+        recalled[cName] = None
+      elif name in self.members:
+        recalled[cName] = Match(name, self.members[name], score, strategy)
+    return recalled
+
+  def recordAliases(self,matches):
+    '''
+    Saves a dictionary of cleaned name: Match (or None) to the alias store.
+    '''
+    if self.aliases is not None and len(matches) > 0:
+      self.aliases.store(self.name, self.fingerprint(),
+                         [(cName,) + ((m.name, m.score, m.strategy) if m is not None else (None, None, None))
+                          for (cName, m) in matches.items()])
+
+  def remember(self,cName,match):
+    '''
+    Stores match as the result for the cleaned name cName in the cache, evicting the
+    least recently used entry when the cache is full. Returns match.
+    '''
+    if self.cacheSize > 0:
+      self.cache[cName] = match
+      self.cache.move_to_end(cName)
+      if len(self.cache) > self.cacheSize:
+        self.cache.popitem(last=False)
+    return match
+
+  def matchName(self,cName):
+    '''
+    Partially matches the cleaned name cName as described in resolve, without
+    going through the cache.
+    '''
+    return self.matchAt(self.locate(cName))
+
+  def matchAt(self,located):
+    '''
+    Returns the Match for a (score, position, form) triple from locate, or None.
+    '''
+    if located is None:
+      return None
+
+    score, position, form = located
+    name, member = self.members.at(position)
+    return Match(name, member, score, STRATEGIES[form])
+
+  def locate(self,cName):
+    '''
+    Returns the (score, position, form) of the member partially matching the cleaned
+    name cName, or None.
+    '''
+    if cName == '':
+      return None
+
+    # (score, position) of the closest member within tolerance for a word of cName
+    wordCount, forms = self.nameForms(cName)
+    def closest(form):
+      return self.indexes[form].closest(forms[form], ERR_TOL)
   
     # match fullnames if longer than one words
-    if numWords(cName) > 1:
-      flNameMatchDec = matchList(-1) 
-      flNameInd = minIndex(flNameMatchDec)
-      if flNameMatchDec[flNameInd] < ERR_TOL:  
-        return self.memberNames[flNameInd]
+    if wordCount > 1:
+      flMatch = closest(FULL)
+      if flMatch is not None:
+        return flMatch + (FULL,)
 
     # single word name, so match first and last names  
-    # match firstnames 
-    fNameMatchDec = matchList(1)  
-    fNameInd = minIndex(fNameMatchDec)
-
-    # match lastnames
-    lNameMatchDec = matchList(0) 
-    lNameInd = minIndex(lNameMatchDec) 
+    fMatch = closest(FIRST)
+    lMatch = closest(LAST)
 
     # return closest matching
-    if fNameMatchDec[fNameInd] < lNameMatchDec[lNameInd] and fNameMatchDec[fNameInd] < ERR_TOL: 
-      return self.memberNames[fNameInd]
-    elif lNameMatchDec[lNameInd] < ERR_TOL: 
-      return self.memberNames[lNameInd]
+    if fMatch is not None and (lMatch is None or fMatch[0] < lMatch[0]):
+      return fMatch + (FIRST,)
+    elif lMatch is not None:
+      return lMatch + (LAST,)
     else:
       return None
 
-  def findMemberr(self,name): 
-    ''' 
-    Finds a member and returns the member object if found. Otherwise, returns None 
+  def scheduleIndexes(self):
     '''
-    if self.isMember(name): 
-      return self.members[self.fullName(name)] 
-    else: 
+    Returns the indexes of the sheet built so far, by class (DateIndex or DutyIndex),
+    forgetting them once the file has changed.
+    '''
+    stat = os.stat(self.extFile)
+    key = (self.extFile, self.extSheet, stat.st_mtime_ns, stat.st_size)
+    if key != self.scheduleKey:
+      self.scheduleIndex = {}
+      self.scheduleKey = key
+    return self.scheduleIndex
+
+  def loadDateIndex(self):
+    '''
+    Returns the DateIndex saved to indexFile for the current state of the sheet, or None.
+    '''
+    if self.indexFile is None:
+      return None
+    try:
+      with open(self.indexFile, 'rb') as indexFile:
+        key, dates = pickle.load(indexFile)
+      return dates if key == (DATE_INDEX_VERSION,) + self.scheduleKey else None
+    # a missing, unreadable or outdated index just means rebuilding
+    except Exception:
       return None
 
-  def upcomingMembersDuties(self,time,timeRange):
+  def saveDateIndex(self, dates):
     '''
-    Returns a list of the upcoming student objects within the specified timerange.
-    '''
-    def inRange(dateStr):
-      '''
-      Input is of the form mm/dd. Return true only if it is in fact within the specified
-      time range.
-      '''
-      # create artifical datetime for the date we are reading
-      try:
-        if DATE_REGEX.match(str(dateStr)):
-          month, day = dateStr.split("/")
-          E_hr, E_mm = EARLIEST_TIME
-          date = datetime.datetime(year=time.year, month=int(month), day=int(day),
-                                   hour=E_hr, minute=E_mm)
-          initDate = datetime.datetime(year=time.year, month=time.month, day=time.day,
-                                       hour=E_hr, minute=E_mm) - datetime.timedelta(days=1)
-          return(initDate < date < (time + timeRange))
-        else:
-          return False
-      
-      # if string is not splittable or if dateStr is not a string with a split attribute
-      except (ValueError,AttributeError) as e:
-        return False
-
-    def checkDates(sheet):
-      '''
-      Input a sheet where dates are in first column. Scan column for indexes of
-      appropriate rows matchings the correct span of days. ithWord(x,0) brings you
-      the 0th word 
-      '''
-      dataColumn = sheet.col_values(0)
-      return([(i, ithWord(str(val),0)) for (i,val) in enumerate(dataColumn) if inRange(ithWord(str(val),0))])
-
-    def readNamesDuties(rows):
-      '''
-      rows - the rows of the excel sheet that from which we need to grab names. The rows
-      are
-      The functions returns the text values of the cells inside rows that are within the 
-      time range. It is assumed that rows contains each row, organized from earlier to later
-      dates. The function returns a dictionary of name: (date,duty) list. Any empty 
-      cells are ignored and note included in the dictionary.
-      '''
-      def accept(val):
-        return (cleanName(val,upper=False) != '')
-      
-      def add(d,cell,v):
-        # try to split the cell input so we can handle multiple names
-        nameList = [cleanName(name, upper=False) for name in cell.split("  ") if accept(name)]
-        for name in nameList:
-          if name in d:
-            d[name].append(v)
-          else:
-            d[name] = [v]
-
-      def isWorkDay(dayStr):
-        '''
-        Input is of format mm/dd where mm/dd is a workday. Compare current day/month
-        to it and return true if the two match.
-        '''
-        try:
-          if DATE_REGEX.match(str(dayStr)):
-            month, day = dayStr.split("/")
-            nmonth, nday = time.month, time.day
-            return(str(nmonth) == month and str(nday) == day)
-          else:
-            return False
-        except (ValueError, AttributeError) as e:
-          return False
+    Saves dates, the DateIndex of the current state of the sheet, to indexFile if any.
+    '''
+    if self.indexFile is None:
+      return
+    try:
+      # written aside first, so a run never reads half an index
+      with open(self.indexFile + ".tmp", 'wb') as indexFile:
+        pickle.dump(((DATE_INDEX_VERSION,) + self.scheduleKey, dates), indexFile,
+                    pickle.HIGHEST_PROTOCOL)
+      os.replace(self.indexFile + ".tmp", self.indexFile)
+    except OSError:
+      print("Warning. Could not save the dates of {} to {}.".format(self.extFile, self.indexFile))
+
+  def dutyIndex(self):
+    '''
+    Returns the DutyIndex of the whole sheet, only reading it again once the file has
+    changed.
+    '''
+    indexes = self.scheduleIndexes()
+    if DutyIndex not in indexes:
+      signs = openSheet(self.extFile, self.extSheet, self.sheetEngine)
+      indexes[DutyIndex] = DutyIndex([(rowDate(val), row) for (val, row) in
+                                      signs.rows(lambda i, val: rowDate(val) is not None)])
+    return indexes[DutyIndex]
+
+  def dutiesBetween(self, start, end):
+    '''
+    Returns the list of (name, (date, duty)) of every duty of the sheet starting from
+    start until end, in time order. The whole sheet is read once, and only again once
+    the file changes, so that any number of windows can be looked at.
+    '''
+    return self.dutyIndex().between(start, end)
 
-      def matchDayToN(n,dayStr):
-        try:
-          if DATE_REGEX.match(str(dayStr)):
-            month, day = dayStr.split("/")
-            return (n == int(day))
-          else:
-            return False
-        except (ValueError, AttributeError) as e:
+  def onDutyAt(self, time):
+    '''
+    Returns the list of (name, (date, duty)) of the duties of the sheet under way at time.
+    '''
+    return self.dutyIndex().at(time)
+
+  def upcomingMembersDuties(self,time,timeRange):
+    '''
+    Returns a dictionary of name: (date,duty) list of the duties starting within the
+    specified timerange, in time order. Only the rows of the days in range are read.
+    The DateIndex of the sheet is kept by the group, and saved to indexFile if given
+    so that later runs find the days by binary search too.
+    '''
+    # read correct sheet, collecting the rows to look at from the index of its first column
+    signs = openSheet(self.extFile, self.extSheet, self.sheetEngine)
+    indexes = self.scheduleIndexes()
+    if DateIndex not in indexes:
+      dates = self.loadDateIndex()
+      if dates is not None:
+        indexes[DateIndex] = dates
+
+    if DateIndex in indexes:
+      rowIndVal = indexes[DateIndex].between(time, timeRange)
+      rowColl = zip([val for (i,val) in rowIndVal], signs.rowsAt([i for (i,val) in rowIndVal]))
+    else:
+      # no index yet: build it while reading the rows in range, in a single pass
+      lo, hi = dateWindow(time, timeRange)
+      dated = []
+      def checkDate(i, val):
+        dateStr = rowDate(val)
+        if dateStr is None:
           return False
+        key = dateKey(dateStr)
+        dated.append((key, i, dateStr))
+        return lo <= key < hi and existsIn(time.year, *key)
 
-      # no rows
-      if len(rows) < 1:
-        return {}
-
-      # get limits
-      lim = time + timeRange
-      limBelow = (time.hour, time.minute) if matchDayToN(time.day,rows[0][DATE]) else EARLIEST_TIME
-      limAbove = (lim.hour, lim.minute) if matchDayToN(lim.day,rows[-1][DATE]) else LATEST_TIME
-
-      # create the dictionary to hold 
-      matchings = {}
-
-      # first row (limit further if today is a work day)
-      if len(rows) == 1:
-        for (i,duty) in checkTime(limBelow, limAbove):
-          add(matchings,rows[0][ROW][i], (rows[0][DATE],duty))
-      # multiple
-      elif len(rows) > 1:
-        for (i,duty) in checkTime(limBelow, LATEST_TIME):
-          add(matchings,rows[0][ROW][i], (rows[0][DATE], duty))
-
-        # last row
-        for (i,duty) in checkTime(EARLIEST_TIME,limAbove):
-          add(matchings, rows[-1][ROW][i], (rows[-1][DATE], duty))
-
-        # everything in between
-        allDuties = checkTime(EARLIEST_TIME,LATEST_TIME)
-        for rowI in range(1,len(rows)-1):    
-          for (i,duty) in checkTime(EARLIEST_TIME,LATEST_TIME):
-            add(matchings,rows[rowI][ROW][i], (rows[rowI][DATE], duty))
-          
-      return(matchings)
-
-    # read correct sheet
-    workbook = xlrd.open_workbook(self.extFile)
-    signs = workbook.sheet_by_name(self.extSheet)
-
-    # collect the row indexes and values to look at by analyzing first column
-    rowIndVal = checkDates(signs)
-    rowColl = [(val, signs.row_values(i)) for (i,val) in rowIndVal]
+      rowColl = [(rowDate(val), row) for (val, row) in signs.rows(checkDate)]
+      indexes[DateIndex] = DateIndex(dated)
+      self.saveDateIndex(indexes[DateIndex])
 
     # grab names and duty from the excel spredsheet, and return them
-    return(readNamesDuties(rowColl))
+    matchings = {}
+    for (name, v) in DutyIndex(rowColl).between(time, time + timeRange):
+      if name in matchings:
+        matchings[name].append(v)
+      else:
+        matchings[name] = [v]
+    return(matchings)
@@ -0,0 +1,210 @@
+import zipfile
+import posixpath
+import xlrd
+from xml.etree.ElementTree import iterparse, parse
+
+# namespaces of the parts of an .xlsx file
+MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+DOC_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+'''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''
+Readers for the Sheet Holding the Meal Shift Schedule
+'''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''
+class XlrdSheet(object):
+  '''
+  Reads a sheet through xlrd. Only that sheet is parsed for .xls workbooks, but xlrd
+  parses every sheet of .xlsx workbooks.
+  '''
+  def __init__(self, filePath, sheetName):
+    self.filePath = filePath
+    self.sheetName = sheetName
+
+  def read(self, collect):
+    '''
+    Returns collect(sheet) for the xlrd sheet, releasing the workbook afterwards.
+    '''
+    workbook = xlrd.open_workbook(self.filePath, on_demand=True)
+    try:
+      found = collect(workbook.sheet_by_name(self.sheetName))
+      workbook.unload_sheet(self.sheetName)
+    finally:
+      workbook.release_resources()
+    return found
+
+  def rows(self, select):
+    '''
+    Returns the list of (first column value, row values) of the rows for which
+    select(row index, first column value) is true, in sheet order.
+    '''
+    return self.read(lambda sheet: [(val, sheet.row_values(i))
+                                    for (i, val) in enumerate(sheet.col_values(0)) if select(i, val)])
+
+  def rowsAt(self, indexes):
+    '''
+    Returns the list of the row values of the rows at indexes.
+    '''
+    if not indexes:
+      return []
+    return self.read(lambda sheet: [sheet.row_values(i) for i in indexes])
+
+def columnIndex(ref):
+  '''
+  Returns the 0-indexed column of a cell reference such as "B12".
+  '''
+  col = 0
+  for c in ref:
+    if not c.isalpha():
+      break
+    col = 26*col + ord(c.upper()) - ord('A') + 1
+  return col - 1
+
+class XlsxStreamSheet(object):
+  '''
+  Reads a sheet of an .xlsx workbook straight from its worksheet XML, one row at a
+  time, discarding each row once read. Only the first cell of a row is decoded
+  unless the row is selected, so memory use does not grow with the sheet.
+  '''
+  def __init__(self, filePath, sheetName):
+    self.filePath = filePath
+    self.sheetName = sheetName
+
+  def sheetPath(self, archive):
+    '''
+    Returns the path in archive of the worksheet XML named sheetName.
+    '''
+    relId = None
+    for sheet in parse(archive.open("xl/workbook.xml")).getroot().iter(MAIN_NS + "sheet"):
+      if sheet.get("name") == self.sheetName:
+        relId = sheet.get(DOC_REL_NS + "id")
+    if relId is None:
+      raise xlrd.XLRDError("No sheet named <{!r}>".format(self.sheetName))
+
+    for rel in parse(archive.open("xl/_rels/workbook.xml.rels")).getroot().iter(PKG_REL_NS + "Relationship"):
+      if rel.get("Id") == relId:
+        target = rel.get("Target")
+        return(target.lstrip("/") if target.startswith("/") else
+               posixpath.normpath(posixpath.join("xl", target)))
+    raise xlrd.XLRDError("No worksheet for sheet <{!r}>".format(self.sheetName))
+
+  def sharedStrings(self, archive):
+    '''
+    Returns the list of the shared strings of archive, which cells refer to by index.
+    '''
+    strings = []
+    if "xl/sharedStrings.xml" not in archive.namelist():
+      return strings
+
+    for (event, elem) in iterparse(archive.open("xl/sharedStrings.xml")):
+      if elem.tag == MAIN_NS + "si":
+        # plain text, or runs of rich text (phonetic runs are left out)
+        texts = [elem] + elem.findall(MAIN_NS + "r")
+        strings.append("".join(t.text or "" for r in texts for t in r.findall(MAIN_NS + "t")))
+        elem.clear()
+    return strings
+
+  def cellValue(self, cell, strings):
+    '''
+    Returns the value of a cell element as xlrd would: text as a string, numbers
+    (dates included) as floats and empty cells as ''.
+    '''
+    kind = cell.get("t", "n")
+    if kind == "inlineStr":
+      return "".join(t.text or "" for t in cell.iter(MAIN_NS + "t"))
+
+    v = cell.find(MAIN_NS + "v")
+    if v is None or v.text is None:
+      return ''
+    elif kind == "s":
+      return strings[int(v.text)]
+    elif kind == "b":
+      return int(v.text)
+    elif kind in ("str", "e"):
+      return v.text
+    else:
+      return float(v.text)
+
+  def walk(self):
+    '''
+    Yields the (row index, cells) of each row of the sheet, where cells are the
+    (column, cell element) of the row. Rows are gone once the next one is read.
+    Sets strings and width for the cells to be decoded with.
+    '''
+    with zipfile.ZipFile(self.filePath) as archive:
+      self.strings = self.sharedStrings(archive)
+      self.width = 0
+      sheetData = None
+      index = -1
+      for (event, elem) in iterparse(archive.open(self.sheetPath(archive)), events=("start", "end")):
+        if event == "start":
+          if elem.tag == MAIN_NS + "sheetData":
+            sheetData = elem
+          continue
+
+        if elem.tag == MAIN_NS + "dimension":
+          self.width = columnIndex(elem.get("ref", "A1").split(":")[-1]) + 1
+        elif elem.tag == MAIN_NS + "row":
+          index = int(elem.get("r")) - 1 if elem.get("r") else index + 1
+          yield (index, [(columnIndex(c.get("r")) if c.get("r") else i, c)
+                         for (i, c) in enumerate(elem.iter(MAIN_NS + "c"))])
+
+          # drop the row, so the tree never holds more than one
+          elem.clear()
+          if sheetData is not None:
+            sheetData.clear()
+
+  def firstValue(self, cells):
+    '''
+    Returns the value of the first column among cells.
+    '''
+    return self.cellValue(cells[0][1], self.strings) if cells and cells[0][0] == 0 else ''
+
+  def rowValues(self, cells):
+    '''
+    Returns the values of a row of cells, padded with '' to the width of the sheet.
+    '''
+    values = [''] * max([self.width] + [col + 1 for (col, c) in cells])
+    for (col, c) in cells:
+      values[col] = self.cellValue(c, self.strings)
+    return values
+
+  def rows(self, select):
+    '''
+    Yields the (first column value, row values) of the rows for which
+    select(row index, first column value) is true, in sheet order.
+    '''
+    for (index, cells) in self.walk():
+      first = self.firstValue(cells)
+      if select(index, first):
+        yield (first, self.rowValues(cells))
+
+  def rowsAt(self, indexes):
+    '''
+    Returns the list of the row values of the rows at indexes. The sheet is only
+    read up to the last of them.
+    '''
+    found = {}
+    wanted = set(indexes)
+    if wanted:
+      last = max(wanted)
+      for (index, cells) in self.walk():
+        if index in wanted:
+          found[index] = self.rowValues(cells)
+        if index >= last:
+          break
+    return [found.get(i, []) for i in indexes]
+
+# readers which can be asked for by name
+SHEET_ENGINES = { "xlrd"   : XlrdSheet,
+                  "stream" : XlsxStreamSheet
+}
+
+def openSheet(filePath, sheetName, engine=None):
+  '''
+  Returns a reader for the sheet sheetName of the workbook at filePath, using engine
+  from SHEET_ENGINES. By default .xlsx workbooks are streamed and other ones are read
+  through xlrd.
+  '''
+  if engine is None:
+    engine = "stream" if filePath.lower().endswith((".xlsx", ".xlsm")) else "xlrd"
+  return SHEET_ENGINES[engine](filePath, sheetName)
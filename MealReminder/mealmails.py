@@ -4,9 +4,15 @@ import pdb
 import datetime
 import csv
 import sys
+import os
+import pickle
+import hashlib
+import multiprocessing
 from os import path
+from itertools import islice
 
-from includes.objects import Student, Group, MailServer
+from includes.objects import Student, Group, MailServer, AliasStore
+from includes.functions import CLEAN_VERSION
 
 # constants as defaults
 FROM = "REU Meal Shift System"
@@ -18,22 +24,84 @@ SMTP_SERVER = 'smtp.fas.harvard.edu'
 # directory where data files are stored
 DATA_DIR = path.join(path.dirname(path.realpath(sys.argv[0])),"data")
 
+# number of student file rows read and added to the group at a time
+LOAD_CHUNK = 1000
+
+# bumped whenever the layout of a Group changes, so older snapshots are rebuilt
+SNAPSHOT_VERSION = 4
+
+# file remembering which student each sheet name resolved to in earlier runs
+ALIAS_FILE = path.join(DATA_DIR, "aliases.sqlite3")
+
 def loadStudentInfo(filePath,group):
   '''
   Reads filePath, which should be a csv with two columns, student name and student
   email. Creates student objects for each student and adds them to the REU group
-  so that they are searchable.
+  so that they are searchable. The file is read and added LOAD_CHUNK rows at a time,
+  with the whitespace around names and emails stripped. Rows missing an email and
+  students whose name is already in the group are reported and skipped, empty rows
+  are skipped. Returns the group.
   '''
-  with open(filePath) as studentFile:
+  with open(filePath, newline='') as studentFile:
+    rows = csv.reader(studentFile)
+
     # skip first line
-    next(studentFile)
+    next(rows, None)
+
+    # create student objects per chunk of lines and add them to group
+    chunk = list(islice(rows, LOAD_CHUNK))
+    while len(chunk) > 0:
+      chunk = [[cell.strip() for cell in info] for info in chunk if any(cell.strip() for cell in info)]
+      for info in chunk:
+        if len(info) < 2:
+          print("Warning. {} has no email in {}, skipped.".format(info[0], filePath))
+      duplicates = group.addMembers([Student(info[0], info[1]) for info in chunk if len(info) >= 2])
+      for student in duplicates:
+        print("Warning. {} ({}) appears more than once in {}, skipped.".format(
+              student.name, student.email, filePath))
+      chunk = list(islice(rows, LOAD_CHUNK))
+
+  return group
+
+def studentFileKey(filePath):
+  '''
+  Returns what identifies a version of the student file: its size, modification
+  time and the hash of its contents, along with the versions of the snapshot layout
+  and of cleanName the members were keyed with.
+  '''
+  info = os.stat(filePath)
+  with open(filePath, 'rb') as studentFile:
+    digest = hashlib.sha1(studentFile.read()).hexdigest()
+  return (SNAPSHOT_VERSION, CLEAN_VERSION, info.st_size, info.st_mtime_ns, digest)
 
-    # create student object per line and add it to group
-    if all(map(lambda info: group.addMember(Student(info[0], info[1])),
-           csv.reader(studentFile))):
+def loadStudentSnapshot(filePath,group):
+  '''
+  Same as loadStudentInfo, but saves the members of the group and their indexes next
+  to filePath, and reuses them on later runs as long as filePath is unchanged and
+  the group uses the same matcher. Returns the group.
+  '''
+  key = studentFileKey(filePath)
+  snapPath = filePath + ".snapshot"
+  try:
+    with open(snapPath, 'rb') as snapFile:
+      snapKey, state = pickle.load(snapFile)
+    if snapKey == key and state["matcher"] == group.matcher:
+      group.restore(state)
       return group
-    else:
-      return None
+  # a missing, unreadable or outdated snapshot just means rebuilding
+  except Exception:
+    pass
+
+  loadStudentInfo(filePath, group)
+  try:
+    # written aside first, so a run never reads half a snapshot
+    with open(snapPath + ".tmp", 'wb') as snapFile:
+      pickle.dump((key, group.snapshot()), snapFile, pickle.HIGHEST_PROTOCOL)
+    os.replace(snapPath + ".tmp", snapPath)
+  except OSError:
+    print("Warning. Could not save the students of {} to {}.".format(filePath, snapPath))
+
+  return group
 
 def prompt(default,message):
   '''
@@ -78,44 +146,51 @@ def main():
                                                   path.join(DATA_DIR, htmlTemp),
                                                   path.join(DATA_DIR, timeFile)) 
   #pdb.set_trace()
-  # read emails into classes
-  REUGroup = loadStudentInfo(mailPath, Group(eFile=timePath, eSheet=timeSheet))
-  #pdb.set_trace()
-  # read student times within the written range
-  dutySet = REUGroup.upcomingMembersDuties(time=datetime.datetime.now(), 
-                                           timeRange=datetime.timedelta(hours=tHours))
-
-  #open connection to mailServer
-  server = MailServer(SMTP_SERVER)
-  try:
-    # create email and send out for each person
-    templates = {}
-    templates['text'] = open(emailPath).read().replace("[from]", FROM).replace("[hours]",str(tHours))
-    templates['html'] = open(htmlPath).read().replace("[from]", FROM).replace("[hours]",str(tHours))
-
-    # pdb.set_trace()
-    for (name, duties) in dutySet.items():
-      # get required information and check for existense of member
-      if REUGroup.isMember(name):
-        fullName = REUGroup.fullName(name)
-        email = REUGroup.members[fullName].email
-        content = server.createMessageContent(name,duties, templates)
-        #pdb.set_trace()
-        # send it out
-        server.sendemail(content, email, From, SUBJECT)
-
-        # tell the user
-        print("Sent email to {} ({}) for {} upcoming shift(s).".format(name, email, len(duties)))
-      else:
-        print("Error. Attempted to send email to {}, but they are not in the group.".format(
-              name))
-        print(duties)
-
-  finally:
-    # close connection
-    server.quit()
+  # read emails into classes, with the names resolved by earlier runs
+  with AliasStore(ALIAS_FILE) as aliases:
+    REUGroup = loadStudentSnapshot(mailPath, Group(eFile=timePath, eSheet=timeSheet, aliases=aliases,
+                                                    indexFile=timePath + ".dates"))
+    #pdb.set_trace()
+    # read student times within the written range
+    dutySet = REUGroup.upcomingMembersDuties(time=datetime.datetime.now(), 
+                                             timeRange=datetime.timedelta(hours=tHours))
+
+    #open connection to mailServer
+    server = MailServer(SMTP_SERVER)
+    try:
+      # create email and send out for each person
+      templates = {}
+      templates['text'] = open(emailPath).read().replace("[from]", FROM).replace("[hours]",str(tHours))
+      templates['html'] = open(htmlPath).read().replace("[from]", FROM).replace("[hours]",str(tHours))
+
+      # match every name on the sheet at once, in worker processes only for large batches
+      matches = REUGroup.resolveMany(dutySet.keys())
+
+      # pdb.set_trace()
+      for (name, duties) in dutySet.items():
+        # get required information and check for existense of member
+        match = matches[name]
+        if match is not None:
+          email = match.member.email
+          content = server.createMessageContent(name,duties, templates)
+          #pdb.set_trace()
+          # send it out
+          server.sendemail(content, email, From, SUBJECT)
+
+          # tell the user
+          print("Sent email to {} ({}) for {} upcoming shift(s).".format(name, email, len(duties)))
+        else:
+          print("Error. Attempted to send email to {}, but they are not in the group.".format(
+                name))
+          print(duties)
+
+    finally:
+      # close connection
+      server.quit()
 
 if __name__ == '__main__':
+  # needed by the name matching worker processes in frozen windows builds
+  multiprocessing.freeze_support()
   main()
 
   # wait for user input